@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+MODEL_CATEGORIES = ['A', 'B', 'C', 'N']
+TOOL_CATEGORIES = ['up', 'down']
+
+class AgreementAnalyzer:
+    """여러 세션(평가자)의 votes_result_{n}.csv 를 페이지 기준으로 맞춰 일치도를 계산한다.
+
+    투표 파일의 best_model / worst_model / model{X}_up·down 은 이미 실제 모델(A, B, C)
+    기준으로 저장되므로 세션별 매핑 없이 바로 비교할 수 있다. 투표하지 않은 페이지는
+    해당 세션의 평가에서 빠진 것으로 처리한다.
+    """
+
+    def __init__(self, sessions, result_path='votes_result_{}.csv'):
+        self.sessions = list(sessions)
+        self.result_path = result_path
+        self.best_codes, self.worst_codes, self.tool_codes = self.load_votes()
+
+    def load_votes(self):
+        votes = []
+        for session in self.sessions:
+            df = pd.read_csv(
+                self.result_path.format(session),
+                usecols=['best_model', 'worst_model'] + [f'model{m}_{v}' for m in 'ABC' for v in TOOL_CATEGORIES],
+                keep_default_na=False,
+            )
+            votes.append(df)
+        if not votes:
+            # 비교할 세션이 없으면 (대상 0, 세션 0) 배열
+            empty = np.empty((0, 0), dtype=np.int8)
+            return empty, empty, empty
+
+        # 세션마다 페이지 수가 다를 수 있으므로 가장 긴 세션 기준으로 맞춤
+        num_pages = max(len(df) for df in votes)
+        votes = [df.reindex(range(num_pages)) for df in votes]
+
+        # (페이지, 세션) 배열, 투표하지 않은 칸은 -1
+        best_codes = np.column_stack([self._encode(df['best_model'], MODEL_CATEGORIES) for df in votes])
+        worst_codes = np.column_stack([self._encode(df['worst_model'], MODEL_CATEGORIES) for df in votes])
+
+        # 툴 평가는 (페이지 x 모델) 을 하나의 평가 대상으로 보고 up=0, down=1, 미평가=-1
+        tool_codes = np.column_stack([
+            np.stack([
+                np.where(df[f'model{m}_up'].fillna(0).to_numpy() > 0, 0,
+                         np.where(df[f'model{m}_down'].fillna(0).to_numpy() > 0, 1, -1))
+                for m in 'ABC'
+            ], axis=1).reshape(-1)
+            for df in votes
+        ])
+        return best_codes, worst_codes, tool_codes
+
+    @staticmethod
+    def _encode(values, categories):
+        # 범주에 없는 값('' 등)은 미평가(-1)
+        values = values.fillna('').astype(str)
+        return pd.Categorical(values.where(values.isin(categories)), categories=categories).codes.astype(np.int8)
+
+    @staticmethod
+    def category_counts(codes, num_categories):
+        # (대상, 범주) 별 평가 수
+        return np.stack([(codes == k).sum(axis=1) for k in range(num_categories)], axis=1)
+
+    @staticmethod
+    def fleiss_kappa(counts):
+        # 평가자 수가 대상마다 다른 경우를 허용하는 Fleiss' kappa (2명 이상 평가한 대상만 사용)
+        raters = counts.sum(axis=1)
+        counts = counts[raters >= 2]
+        raters = raters[raters >= 2]
+        if len(counts) == 0:
+            return float('nan')
+        p_i = ((counts * (counts - 1)).sum(axis=1)) / (raters * (raters - 1))
+        p_bar = p_i.mean()
+        p_j = counts.sum(axis=0) / raters.sum()
+        p_e = (p_j ** 2).sum()
+        if p_e == 1:
+            return 1.0 if p_bar == 1 else float('nan')
+        return float((p_bar - p_e) / (1 - p_e))
+
+    @staticmethod
+    def krippendorff_alpha(counts):
+        # 명목 척도 Krippendorff's alpha (coincidence matrix 의 대각 성분만 사용)
+        raters = counts.sum(axis=1)
+        counts = counts[raters >= 2].astype(float)
+        raters = raters[raters >= 2]
+        if len(counts) == 0:
+            return float('nan')
+        observed = ((counts * (counts - 1)).sum(axis=1) / (raters - 1)).sum()
+        n_c = counts.sum(axis=0)
+        n = n_c.sum()
+        expected = n ** 2 - (n_c ** 2).sum()
+        if expected == 0:
+            return 1.0 if observed == n else float('nan')
+        return float(1 - (n - 1) * (n - observed) / expected)
+
+    @staticmethod
+    def _disagreement(counts):
+        # 2명 이상 평가했는데 의견이 갈린 대상
+        raters = counts.sum(axis=1)
+        return (raters >= 2) & (counts.max(axis=1) < raters)
+
+    def page_disagreements(self):
+        """페이지별 평가자 수와 불일치 여부를 DataFrame 으로 반환한다."""
+        best_counts = self.category_counts(self.best_codes, len(MODEL_CATEGORIES))
+        worst_counts = self.category_counts(self.worst_codes, len(MODEL_CATEGORIES))
+        tool_counts = self.category_counts(self.tool_codes, len(TOOL_CATEGORIES))
+        tool_disagree = self._disagreement(tool_counts).reshape(-1, 3)
+
+        return pd.DataFrame({
+            'page': np.arange(len(self.best_codes)),
+            'best_raters': best_counts.sum(axis=1),
+            'best_disagree': self._disagreement(best_counts),
+            'worst_raters': worst_counts.sum(axis=1),
+            'worst_disagree': self._disagreement(worst_counts),
+            'modelA_tool_disagree': tool_disagree[:, 0],
+            'modelB_tool_disagree': tool_disagree[:, 1],
+            'modelC_tool_disagree': tool_disagree[:, 2],
+        })
+
+    def calculate_agreement(self):
+        """best / worst / 툴 평가별 Fleiss' kappa 와 Krippendorff's alpha."""
+        results = {}
+        for name, codes, categories in [
+            ('best', self.best_codes, MODEL_CATEGORIES),
+            ('worst', self.worst_codes, MODEL_CATEGORIES),
+            ('tool', self.tool_codes, TOOL_CATEGORIES),
+        ]:
+            counts = self.category_counts(codes, len(categories))
+            results[name] = {
+                'items': int((counts.sum(axis=1) >= 2).sum()),
+                'fleiss_kappa': self.fleiss_kappa(counts),
+                'krippendorff_alpha': self.krippendorff_alpha(counts),
+                'disagreements': int(self._disagreement(counts).sum()),
+            }
+        return results
+
+    def format_agreement(self):
+        results = self.calculate_agreement()
+        sessions = ", ".join(str(s) for s in self.sessions)
+        text = f"\n### 평가자 일치도 (세션 {sessions})\n"
+        labels = {'best': '베스트 모델', 'worst': '워스트 모델', 'tool': '툴 평가'}
+        # 두 세션 이상이 평가한 대상이 없으면 계산할 수 없으므로 '-' 로 표시
+        value = lambda x: '-' if np.isnan(x) else f"{x:.3f}"
+        for name, result in results.items():
+            text += (
+                f"- {labels[name]}: Fleiss' κ {value(result['fleiss_kappa'])}, "
+                f"Krippendorff's α {value(result['krippendorff_alpha'])} "
+                f"(비교 대상 {result['items']}건, 불일치 {result['disagreements']}건)\n"
+            )
+        return text
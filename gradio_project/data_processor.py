@@ -1,5 +1,7 @@
 import json
 import ast
+import hashlib
+import sys
 import pandas as pd
 import random
 
@@ -9,6 +11,11 @@ class DataProcessor:
         self.session = session
         self.df = pd.read_csv(csv_path)
         
+        # 같은 대화가 여러 페이지/열에 반복되므로 내용 해시 기준으로 한 번만 저장
+        self.transcripts = {}
+        self.transcript_keys = {}
+        self.dedupe_stats = self.deduplicate_transcripts()
+        
         # 세션별 매핑 파일 경로
         self.mapping_file = f'session_{session}_mapping.json'
         
@@ -30,6 +37,45 @@ class DataProcessor:
         
         self.save_votes()
     
+    def deduplicate_transcripts(self):
+        total_cells = 0
+        total_bytes = 0
+        for column in ['data1', 'data2', 'data3']:
+            if column not in self.df.columns:
+                continue
+            keys = []
+            values = []
+            for content in self.df[column]:
+                if not isinstance(content, str):
+                    keys.append(None)
+                    values.append(content)
+                    continue
+                key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+                total_cells += 1
+                total_bytes += sys.getsizeof(content)
+                # 같은 해시를 가진 모든 칸이 처음 읽은 문자열 객체 하나를 공유
+                keys.append(key)
+                values.append(self.transcripts.setdefault(key, content))
+            self.transcript_keys[column] = keys
+            self.df[column] = pd.Series(values, index=self.df.index, dtype=object)
+        
+        unique_bytes = sum(sys.getsizeof(content) for content in self.transcripts.values())
+        stats = {
+            'total': total_cells,
+            'unique': len(self.transcripts),
+            'ratio': total_cells / len(self.transcripts) if self.transcripts else 1.0,
+            'bytes_saved': total_bytes - unique_bytes,
+        }
+        print(f"대화 중복 제거: {stats['total']}개 중 고유 {stats['unique']}개 "
+              f"(중복 비율 {stats['ratio']:.2f}x, 메모리 {stats['bytes_saved'] / 1024 / 1024:.1f}MB 절약)")
+        return stats
+    
+    def get_transcript(self, page_index, model):
+        # 실제 모델(A, B, C)의 대화 내용과 내용 해시
+        column = f'data{ord(model)-64}'
+        keys = self.transcript_keys.get(column)
+        return self.df[column][page_index], keys[page_index] if keys else None
+    
     def load_or_create_page_mappings(self):
         try:
             # 기존 매핑 파일이 있으면 로드
@@ -72,7 +118,8 @@ class DataProcessor:
         })
         votes_df.to_csv(f'votes_result_{self.session}.csv', index=False)
     
-    def parse_messages(self, data):
+    @staticmethod
+    def parse_messages(data):
         parsed_conversations = []
         current_conversation = {"question": "", "query": [], "answer": ""}
         
@@ -99,7 +146,8 @@ class DataProcessor:
         
         return parsed_conversations
     
-    def parse_messages_refactored(self, data):
+    @staticmethod
+    def parse_messages_refactored(data):
         parsed_conversations = []
         current_conversation = {"question": "", "query": [], "answer": ""}
         
@@ -160,31 +208,34 @@ class DataProcessor:
         return parsed_conversations
     
         
-    def process_file(self, file_content):
+    @staticmethod
+    def process_file(file_content):
         if not file_content or pd.isna(file_content):
             return []
         try:
             data_dict = ast.literal_eval(file_content)
             messages = data_dict.get("memory", {}).get("messages", [])
-            return self.parse_messages(messages)
+            return DataProcessor.parse_messages(messages)
         except Exception as e:
             print(f"Error processing file: {str(e)}")
             return []
         
-    def process_file_refactored(self, file_content):
+    @staticmethod
+    def process_file_refactored(file_content):
         if not file_content or pd.isna(file_content):
             return []
         try:
             data_dict = ast.literal_eval(file_content)
             messages = data_dict.get('messages', [])
-            return self.parse_messages_refactored(messages)
+            return DataProcessor.parse_messages_refactored(messages)
         except Exception as e:
             print(f"Error processing file: {str(e)}")
             return []
 
-    def display_conversations(self, file_content):
+    @staticmethod
+    def display_conversations(file_content):
         try:
-            conversations = self.process_file(file_content)
+            conversations = DataProcessor.process_file(file_content)
             responses = []
             
             for conv in conversations:
@@ -207,9 +258,10 @@ class DataProcessor:
             print(f"Error in display_conversations: {e}")
             return []
         
-    def display_conversations_refactored(self, file_content):
+    @staticmethod
+    def display_conversations_refactored(file_content):
         try:
-            conversations = self.process_file_refactored(file_content)
+            conversations = DataProcessor.process_file_refactored(file_content)
             responses = []
             
             for conv in conversations:
@@ -1,196 +1,238 @@
-import gradio as gr
+import json
+import threading
 import pandas as pd
+from gradio_project.panel_parser import PanelParser
+from gradio_project.statistics_publisher import StatisticsPublisher
+from gradio_project.profiler import RequestProfiler, profiled
 
 class EventHandler:
-    def __init__(self, data_processor):
+    def __init__(self, data_processor, parse_workers=None, stats_interval=5.0, profiler=None,
+                 prefetch_radius=1, parse_cache_bytes=64 * 1024 * 1024):
         self.data_processor = data_processor
+        # 큰 대화 셀 파싱용 프로세스 풀 (모든 사용자가 공유, 작은 셀은 요청 스레드에서 파싱)
+        # 파싱 결과 캐시는 parse_cache_bytes 크기까지만 보관
+        self.panel_parser = PanelParser(max_workers=parse_workers, cache_bytes=parse_cache_bytes)
+        # 통계는 투표마다 계산하지 않고 주기적으로 한 번만 계산해 모든 사용자에게 전달
+        self.statistics_publisher = StatisticsPublisher(data_processor, interval=stats_interval)
+        # 느린 요청 프로파일링 (기본은 꺼짐, 실행 중 toggle() 또는 SIGUSR1 로 전환)
+        self.profiler = profiler or RequestProfiler()
+        # 페이지 이동 시 앞뒤로 미리 보내줄 페이지 수
+        self.prefetch_radius = prefetch_radius
+        # 투표 기록/저장과 세션 전환을 한 번에 하나씩 처리 (세션은 모든 사용자가 공유)
+        self.votes_lock = threading.Lock()
     
+    def close(self):
+        # 서버 종료 시 파싱용 워커 프로세스 정리
+        self.panel_parser.close()
+    
+    def profile_context(self, page_index=0, *args):
+        # 세션 변경은 세션 이름이 첫 인자이고 0 페이지를 불러옴
+        if not isinstance(page_index, (int, float)):
+            page_index = 0
+        page_index = int(page_index)
+        df = self.data_processor.df
+        transcript_sizes = {}
+        if 0 <= page_index < len(df):
+            for k in range(1, 4):
+                content = df[f'data{k}'][page_index]
+                transcript_sizes[f'data{k}'] = len(content) if isinstance(content, str) else 0
+        return {
+            'page_index': page_index,
+            'session': self.data_processor.session,
+            'transcript_sizes': transcript_sizes,
+        }
+    
+    @profiled
     def load_initial_page(self):
         # 현재 페이지의 매핑 가져오기
         mapping = self.data_processor.get_mapping_for_page(0)
         
         # 매핑에 따라 데이터 순서 변경
-        file_contents = []
-        display_methods = []  # 각 모델별 display 메소드 저장
-        
-        for i in range(1, 4):
-            model = mapping[str(i)]  # 키를 문자열로 변환
-            file_contents.append(self.data_processor.df[f'data{ord(model)-64}'][0])
-            # A 모델은 display_conversations, B,C 모델은 display_conversations_refactored 사용
-            display_methods.append(
-                self.data_processor.display_conversations if model == 'A' 
-                else self.data_processor.display_conversations_refactored
-            )
+        panels = self.page_panels(0, mapping)
             
         current_page = f"현재 페이지: 1 / {len(self.data_processor.df)}"
         
+        # 세 패널을 동시에 파싱
+        conversations = self.panel_parser.display_panels(panels)
+        
         return (
-            display_methods[0](file_contents[0]),
-            display_methods[1](file_contents[1]),
-            display_methods[2](file_contents[2]),
+            conversations[0],
+            conversations[1],
+            conversations[2],
             current_page
         )
 
-    def update_page(self, page_index):
-        # 현재 페이지의 매핑 가져오기
-        mapping = self.data_processor.get_mapping_for_page(page_index)
-        
-        # 매핑에 따라 데이터 순서 변경
-        file_contents = []
-        display_methods = []
-        
+    def page_panels(self, page_index, mapping=None):
+        # 표시 위치 순서의 (refactored 여부, 대화 내용, 내용 해시)
+        # A 모델은 display_conversations, B,C 모델은 display_conversations_refactored 사용
+        if mapping is None:
+            mapping = self.data_processor.get_mapping_for_page(page_index)
+        panels = []
         for i in range(1, 4):
             model = mapping[str(i)]
-            file_contents.append(self.data_processor.df[f'data{ord(model)-64}'][page_index])
-            display_methods.append(
-                self.data_processor.display_conversations if model == 'A' 
-                else self.data_processor.display_conversations_refactored
-            )
-        
-        current_page = f"현재 페이지: {page_index + 1} / {len(self.data_processor.df)}"
-        
-        # 현재 페이지의 best/worst 모델 가져오기
+            file_content, key = self.data_processor.get_transcript(page_index, model)
+            panels.append((model != 'A', file_content, key))
+        return panels
+
+    def page_state(self, page_index):
+        # 표시 위치(1~3) 기준의 투표 상태 (실제 모델 매핑은 클라이언트에 보내지 않음)
+        mapping = self.data_processor.get_mapping_for_page(page_index)
+        positions = {mapping[str(i)]: i for i in range(1, 4)}
         best_model = self.data_processor.df.at[page_index, 'best_model']
         worst_model = self.data_processor.df.at[page_index, 'worst_model']
-        
-        # 중립 상태 확인
-        is_neutral = best_model == 'N' and worst_model == 'N'
-        
-        # 각 버튼의 상태 설정
-        button_states = []
-        for i in range(1, 4):
-            model = mapping[str(i)]
-            # Best 모델 버튼 상태
-            if best_model == model:
-                button_states.append(gr.Button(value=f"모델 {i} (선택됨)", interactive=not is_neutral))
-            else:
-                button_states.append(gr.Button(value=f"모델 {i}", interactive=not is_neutral))
-                
-        # Worst 모델 버튼 상태
+
+        tools = []
         for i in range(1, 4):
             model = mapping[str(i)]
-            if worst_model == model:
-                button_states.append(gr.Button(value=f"모델 {i} (선택됨)", interactive=not is_neutral))
-            else:
-                button_states.append(gr.Button(value=f"모델 {i}", interactive=not is_neutral))
-        
-        # 툴 평가 버튼 상태
-        tool_button_states = []
-        for i in range(1, 4):
-            model = mapping[str(i)]  # 현재 표시 위치의 실제 모델(A,B,C)
-            up_state = "👍 완료" if self.data_processor.df.at[page_index, f'model{model}_up'] > 0 else f"모델 {i} 툴 good"
-            down_state = "👎 완료" if self.data_processor.df.at[page_index, f'model{model}_down'] > 0 else f"모델 {i} 툴 bad"
-            tool_button_states.extend([up_state, down_state])
-        
-        return [
-            display_methods[0](file_contents[0]),
-            display_methods[1](file_contents[1]),
-            display_methods[2](file_contents[2]),
-            page_index,
-            current_page,
-            *button_states,  # best/worst 모델 버튼들
-            gr.Button(value="선택 취소", interactive=True),
-            *[gr.Button(value=state) for state in tool_button_states]  # 툴 평가 버튼들
-        ]
+            tools.append([
+                bool(self.data_processor.df.at[page_index, f'model{model}_up'] > 0),
+                bool(self.data_processor.df.at[page_index, f'model{model}_down'] > 0),
+            ])
 
-    def cancel_selection(self, page_index, slider):
-        # 모델 선택 초기화
-        self.data_processor.df.at[page_index, 'best_model'] = ''
-        self.data_processor.df.at[page_index, 'worst_model'] = ''
-        
-        # 툴 평가 상태 초기화 (A,B,C 기준으로 변경)
-        for model in ['A', 'B', 'C']:
-            self.data_processor.df.at[page_index, f'model{model}_up'] = 0
-            self.data_processor.df.at[page_index, f'model{model}_down'] = 0
-        
-        self.data_processor.save_votes()
-        
-        stats = self.data_processor.calculate_statistics()
-        return self.update_page(page_index) + [page_index, str(stats), True]
+        return {
+            'best': positions.get(best_model),
+            'worst': positions.get(worst_model),
+            'neutral': bool(best_model == 'N' and worst_model == 'N'),
+            'tools': tools,
+        }
 
-    def move_page(self, page_index, direction):
-        new_page = max(0, min(len(self.data_processor.df) - 1, page_index + direction))
-        return self.update_page(new_page) + [new_page]
+    @profiled
+    def get_page_bundle(self, page_index, known_pages=""):
+        # 클라이언트 페이지 캐시용 데이터: 현재 페이지의 최신 투표 상태와 주변 페이지 미리 받기
+        total = len(self.data_processor.df)
+        page_index = max(0, min(total - 1, int(page_index)))
+        known = set(json.loads(known_pages)) if known_pages else set()
 
-    def update_tool_vote(self, page_index, display_num, vote_type):
-        # 현재 페이지의 매핑 가져오기
-        mapping = self.data_processor.get_mapping_for_page(page_index)
-        # 표시 번호를 실제 모델로 변환
-        actual_model = mapping[str(display_num)]  # A, B, C 중 하나
+        pages = {}
+        panels = []
+        parsed_pages = []
+        for page in range(max(0, page_index - self.prefetch_radius), min(total, page_index + self.prefetch_radius + 1)):
+            # 이미 캐시에 있는 주변 페이지는 생략, 현재 페이지는 상태만 다시 확인
+            if page in known and page != page_index:
+                continue
+            pages[str(page)] = {'state': self.page_state(page)}
+            if page not in known:
+                panels.extend(self.page_panels(page))
+                parsed_pages.append(page)
+
+        # 받아야 할 모든 페이지의 패널을 한 번에 동시에 파싱
+        conversations = self.panel_parser.display_panels(panels)
+        for n, page in enumerate(parsed_pages):
+            pages[str(page)]['conversations'] = conversations[n * 3:n * 3 + 3]
+
+        return json.dumps({'current': page_index, 'total': total, 'pages': pages}, ensure_ascii=False)
+
+    def state_bundle(self, page_index):
+        # 투표 응답용: 대화는 이미 클라이언트 캐시에 있으므로 현재 페이지의 투표 상태만 보냄
+        return json.dumps({
+            'current': page_index,
+            'total': len(self.data_processor.df),
+            'pages': {str(page_index): {'state': self.page_state(page_index)}},
+        })
+
+    @profiled
+    def cancel_selection(self, page_index):
+        with self.votes_lock:
+            # 모델 선택 초기화
+            self.data_processor.df.at[page_index, 'best_model'] = ''
+            self.data_processor.df.at[page_index, 'worst_model'] = ''
+        
+            # 툴 평가 상태 초기화 (A,B,C 기준으로 변경)
+            for model in ['A', 'B', 'C']:
+                self.data_processor.df.at[page_index, f'model{model}_up'] = 0
+                self.data_processor.df.at[page_index, f'model{model}_down'] = 0
         
-        # 이전 선택 초기화
-        opposite_vote = "down" if vote_type == "up" else "up"
-        self.data_processor.df.at[page_index, f'model{actual_model}_{opposite_vote}'] = 0
+            self.data_processor.save_votes()
         
-        # 새로운 선택 기록 (1로 고정)
-        column_name = f'model{actual_model}_{vote_type}'
-        current_value = self.data_processor.df.at[page_index, column_name]
-        # 이미 1이면 0으로, 아니면 1로 설정 (토글 기능)
-        self.data_processor.df.at[page_index, column_name] = 0 if current_value == 1 else 1
+            self.statistics_publisher.mark_dirty()
+            return self.state_bundle(page_index)
+
+    @profiled
+    def update_tool_vote(self, page_index, display_num, vote_type):
+        with self.votes_lock:
+            # 현재 페이지의 매핑 가져오기
+            mapping = self.data_processor.get_mapping_for_page(page_index)
+            # 표시 번호를 실제 모델로 변환
+            actual_model = mapping[str(display_num)]  # A, B, C 중 하나
+        
+            # 이전 선택 초기화
+            opposite_vote = "down" if vote_type == "up" else "up"
+            self.data_processor.df.at[page_index, f'model{actual_model}_{opposite_vote}'] = 0
+        
+            # 새로운 선택 기록 (1로 고정)
+            column_name = f'model{actual_model}_{vote_type}'
+            current_value = self.data_processor.df.at[page_index, column_name]
+            # 이미 1이면 0으로, 아니면 1로 설정 (토글 기능)
+            self.data_processor.df.at[page_index, column_name] = 0 if current_value == 1 else 1
         
-        self.data_processor.save_votes()
+            self.data_processor.save_votes()
         
-        stats = self.data_processor.calculate_statistics()
-        return self.update_page(page_index) + [page_index, str(stats)]
+            self.statistics_publisher.mark_dirty()
+            return self.state_bundle(page_index)
 
+    @profiled
     def update_model_vote(self, page_index, model_num, vote_type):
-        # 중립 선택 시
-        if model_num == 'N':
-            self.data_processor.df.at[page_index, 'best_model'] = 'N'
-            self.data_processor.df.at[page_index, 'worst_model'] = 'N'
-            self.data_processor.save_votes()
-            stats = self.data_processor.calculate_statistics()
-            return self.update_page(page_index) + [page_index, str(stats)]
-        
-        # 일반 모델 선택 시 (기존 코드)
-        mapping = self.data_processor.get_mapping_for_page(page_index)
-        actual_model = mapping[str(model_num)]
-        
-        column_name = f'{vote_type}_model'
-        self.data_processor.df.at[page_index, column_name] = actual_model
+        with self.votes_lock:
+            # 중립 선택 시
+            if model_num == 'N':
+                self.data_processor.df.at[page_index, 'best_model'] = 'N'
+                self.data_processor.df.at[page_index, 'worst_model'] = 'N'
+                self.data_processor.save_votes()
+                self.statistics_publisher.mark_dirty()
+                return self.state_bundle(page_index)
+        
+            # 일반 모델 선택 시 (기존 코드)
+            mapping = self.data_processor.get_mapping_for_page(page_index)
+            actual_model = mapping[str(model_num)]
+        
+            column_name = f'{vote_type}_model'
+            self.data_processor.df.at[page_index, column_name] = actual_model
+        
+            if vote_type == 'best':
+                if self.data_processor.df.at[page_index, 'worst_model'] == actual_model:
+                    self.data_processor.df.at[page_index, 'worst_model'] = ''
+            elif vote_type == 'worst':
+                if self.data_processor.df.at[page_index, 'best_model'] == actual_model:
+                    self.data_processor.df.at[page_index, 'best_model'] = ''
         
-        if vote_type == 'best':
-            if self.data_processor.df.at[page_index, 'worst_model'] == actual_model:
-                self.data_processor.df.at[page_index, 'worst_model'] = ''
-        elif vote_type == 'worst':
-            if self.data_processor.df.at[page_index, 'best_model'] == actual_model:
-                self.data_processor.df.at[page_index, 'best_model'] = ''
-        
-        self.data_processor.save_votes()
-        stats = self.data_processor.calculate_statistics()
-        return self.update_page(page_index) + [page_index, str(stats)]
+            self.data_processor.save_votes()
+            self.statistics_publisher.mark_dirty()
+            return self.state_bundle(page_index)
     
+    @profiled
     def change_session(self, session):
         # 세션 번호 추출 (예: "세션 1" -> 1)
         session_num = int(session.split()[-1])
         
-        # 데이터 프로세서의 세션 변경
-        self.data_processor.session = session_num
-        
-        # 이전 세션의 투표 데이터 로드 (만약 있다면)
-        try:
-            previous_votes = pd.read_csv(f'votes_result_session_{session_num}.csv')
-            self.data_processor.df['best_model'] = previous_votes['best_model']
-            self.data_processor.df['worst_model'] = previous_votes['worst_model']
-            self.data_processor.df['model1_up'] = previous_votes['model1_up']
-            self.data_processor.df['model1_down'] = previous_votes['model1_down']
-            self.data_processor.df['model2_up'] = previous_votes['model2_up']
-            self.data_processor.df['model2_down'] = previous_votes['model2_down']
-            self.data_processor.df['model3_up'] = previous_votes['model3_up']
-            self.data_processor.df['model3_down'] = previous_votes['model3_down']
-        except FileNotFoundError:
-            # 파일이 없으면 초기화
-            self.data_processor.df['best_model'] = ''
-            self.data_processor.df['worst_model'] = ''
-            self.data_processor.df['model1_up'] = 0
-            self.data_processor.df['model1_down'] = 0
-            self.data_processor.df['model2_up'] = 0
-            self.data_processor.df['model2_down'] = 0
-            self.data_processor.df['model3_up'] = 0
-            self.data_processor.df['model3_down'] = 0
-        
-        self.data_processor.save_votes()
-        stats = self.data_processor.calculate_statistics()
-        
-        # 페이지 초기화 및 데이터 로드
-        return self.update_page(0) + [0, str(stats)]
\ No newline at end of file
+        # 투표 저장과 세션 전환이 섞이면 한 세션의 투표가 다른 세션 파일에 저장되므로 잠금
+        with self.votes_lock:
+            # 데이터 프로세서의 세션 변경
+            self.data_processor.session = session_num
+        
+            # 이전 세션의 투표 데이터 로드 (만약 있다면, save_votes 가 쓰는 파일과 열 이름)
+            try:
+                previous_votes = pd.read_csv(f'votes_result_{session_num}.csv', keep_default_na=False)
+                self.data_processor.df['best_model'] = previous_votes['best_model']
+                self.data_processor.df['worst_model'] = previous_votes['worst_model']
+                self.data_processor.df['modelA_up'] = previous_votes['modelA_up']
+                self.data_processor.df['modelA_down'] = previous_votes['modelA_down']
+                self.data_processor.df['modelB_up'] = previous_votes['modelB_up']
+                self.data_processor.df['modelB_down'] = previous_votes['modelB_down']
+                self.data_processor.df['modelC_up'] = previous_votes['modelC_up']
+                self.data_processor.df['modelC_down'] = previous_votes['modelC_down']
+            except FileNotFoundError:
+                # 파일이 없으면 초기화
+                self.data_processor.df['best_model'] = ''
+                self.data_processor.df['worst_model'] = ''
+                self.data_processor.df['modelA_up'] = 0
+                self.data_processor.df['modelA_down'] = 0
+                self.data_processor.df['modelB_up'] = 0
+                self.data_processor.df['modelB_down'] = 0
+                self.data_processor.df['modelC_up'] = 0
+                self.data_processor.df['modelC_down'] = 0
+        
+            self.data_processor.save_votes()
+            self.statistics_publisher.mark_dirty()
+        
+        # 페이지 초기화 및 데이터 로드 (클라이언트 캐시는 비워진 상태)
+        return self.get_page_bundle(0)
@@ -0,0 +1,224 @@
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from gradio_project.data_processor import DataProcessor
+from gradio_project.profiler import active_sampler, sample_call
+
+def _init_worker():
+    # 워커에서는 파싱에 필요한 모듈만 불러옴 (gradio 는 불러오지 않음)
+    import gradio_project.data_processor  # noqa: F401
+
+def _worker_ready():
+    return os.getpid()
+
+@contextlib.contextmanager
+def _without_main_module():
+    # spawn 은 워커마다 __main__(main.py → gradio)을 다시 import 하므로
+    # 워커를 띄우는 동안만 빈 __main__ 으로 바꿔 둔다. 프로세스 전체에 영향을 주므로
+    # 요청을 받기 전(PanelParser 생성 시)에만 사용한다.
+    main_module = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main_module
+
+class PanelParser:
+    """세 패널의 대화 파싱을 동시에 실행한다.
+
+    큰 셀의 literal_eval 은 CPU 를 오래 점유하므로 프로세스 풀에서 처리하고, 작은 셀은
+    요청한 스레드에서 바로 파싱한다 (GIL 때문에 스레드로 나눠도 빨라지지 않고, 공유
+    스레드 풀을 두면 다른 사용자의 작업 뒤에 줄을 서게 됨). 프로세스 풀은 생성 시에만
+    띄워 두고, 풀이 깨지면 요청 중에 다시 띄우지 않고 이후로는 요청 스레드에서 파싱한다.
+    서버를 종료할 때 close() 로 워커를 정리한다.
+    내용 해시가 주어진 패널은 파싱 결과를 최근 것부터 cache_bytes 크기까지 보관해, 같은
+    대화를 가리키는 다른 페이지/열에서 다시 파싱하지 않는다 (대화 하나가 수 MB 일 수
+    있으므로 개수가 아니라 크기로 제한). 여러 요청이 동시에 같은 대화를
+    요청하면 한 요청만 파싱하고 나머지는 그 결과를 기다린다.
+    """
+
+    def __init__(self, max_workers=None, process_threshold=200_000, cache_bytes=64 * 1024 * 1024):
+        # max_workers=0 이면 프로세스 풀을 쓰지 않고 요청 스레드에서만 파싱
+        if max_workers is None:
+            max_workers = min(3, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.process_threshold = process_threshold
+        self._lock = threading.Lock()
+        self._process_pool = None
+        self.cache_bytes = cache_bytes
+        # {cache_key: (파싱 결과, 추정 크기)}
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        # 다른 요청이 파싱 중인 대화 {cache_key: Future}, 같은 대화는 한 번만 파싱
+        self._inflight = {}
+        self._cache_lock = threading.Lock()
+        if max_workers > 0:
+            self._process_pool = self._start_process_pool()
+
+    def _claim(self, cache_key):
+        # (캐시된 결과, 다른 요청의 Future) 중 하나를 반환하고, 둘 다 없으면 이 요청이 파싱을 맡음
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached[0], None
+            pending = self._inflight.get(cache_key)
+            if pending is not None:
+                return None, pending
+            self._inflight[cache_key] = Future()
+            return None, None
+
+    @staticmethod
+    def _result_size(result):
+        # 대화 목록 [[질문, 답변], ...] 의 대략적인 메모리 크기
+        size = sys.getsizeof(result)
+        for message in result:
+            size += sys.getsizeof(message)
+            size += sum(sys.getsizeof(text) for text in message if text is not None)
+        return size
+
+    def _finish(self, cache_key, result=None, error=None):
+        size = self._result_size(result) if error is None else 0
+        with self._cache_lock:
+            # 한도보다 큰 결과는 보관하지 않음 (동시에 기다리던 요청에는 그대로 전달)
+            if error is None and size <= self.cache_bytes:
+                self._cache[cache_key] = (result, size)
+                self._cached_bytes += size
+                while self._cached_bytes > self.cache_bytes:
+                    _, (_, evicted) = self._cache.popitem(last=False)
+                    self._cached_bytes -= evicted
+            pending = self._inflight.pop(cache_key)
+        if error is None:
+            pending.set_result(result)
+        else:
+            pending.set_exception(error)
+
+    def _start_process_pool(self):
+        # gradio 서버 스레드가 떠 있는 상태에서 fork 하지 않도록 spawn 사용
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # 첫 submit 에서 워커가 모두 뜨므로 첫 사용자가 기동 비용을 내지 않도록 미리 띄움
+        with _without_main_module():
+            for _ in range(self.max_workers):
+                pool.submit(_worker_ready)
+        return pool
+
+    def _pool_broken(self, broken_pool):
+        # 요청 처리 중에 워커를 다시 띄우지 않고 이후로는 요청 스레드에서 파싱
+        with self._lock:
+            if self._process_pool is not broken_pool:
+                return
+            self._process_pool = None
+        print("Process pool is broken, parsing in request threads from now on")
+        broken_pool.shutdown(wait=False)
+
+    def _use_process_pool(self, file_content):
+        return (
+            self._process_pool is not None
+            and isinstance(file_content, str)
+            and len(file_content) >= self.process_threshold
+        )
+
+    @staticmethod
+    def _display_method(refactored):
+        return (
+            DataProcessor.display_conversations_refactored if refactored
+            else DataProcessor.display_conversations
+        )
+
+    def display_panels(self, panels):
+        """(refactored 여부, 셀 내용, 내용 해시) 목록을 받아 같은 순서로 대화 목록을 반환한다."""
+        results = [None] * len(panels)
+        # 같은 요청 안에서 같은 대화가 여러 번 나오면 한 번만 파싱
+        tasks = OrderedDict()
+        # 다른 요청이 이미 파싱 중인 대화 {cache_key: [Future, 결과 위치]}
+        waiting = {}
+        for n, (refactored, file_content, key) in enumerate(panels):
+            cache_key = (refactored, key) if key is not None else ('panel', n)
+            if cache_key in tasks:
+                tasks[cache_key][3].append(n)
+                continue
+            if cache_key in waiting:
+                waiting[cache_key][1].append(n)
+                continue
+            if key is not None:
+                cached, pending = self._claim(cache_key)
+                if cached is not None:
+                    results[n] = cached
+                    continue
+                if pending is not None:
+                    waiting[cache_key] = [pending, [n]]
+                    continue
+            tasks[cache_key] = [refactored, file_content, None, [n]]
+
+        unfinished = [cache_key for cache_key in tasks if cache_key[0] != 'panel']
+        try:
+            # 큰 셀을 먼저 프로세스 풀에 넘기고, 기다리는 동안 작은 셀은 이 스레드에서 파싱
+            for task in tasks.values():
+                if self._use_process_pool(task[1]):
+                    task[2] = self._submit(task[0], task[1])
+
+            # 맡은 대화를 모두 끝낸 뒤에 다른 요청을 기다리므로 서로 기다리다 멈추지 않음
+            for cache_key, (refactored, file_content, submitted, indexes) in tasks.items():
+                result = self._result(refactored, file_content, submitted)
+                if cache_key[0] != 'panel':
+                    self._finish(cache_key, result)
+                    unfinished.remove(cache_key)
+                for n in indexes:
+                    results[n] = result
+        except BaseException as e:
+            # 맡았던 대화를 기다리는 다른 요청에도 실패를 알려 영원히 기다리지 않게 함
+            for claimed in unfinished:
+                self._finish(claimed, error=e)
+            raise
+
+        for pending, indexes in waiting.values():
+            result = pending.result()
+            for n in indexes:
+                results[n] = result
+        return results
+
+    def _submit(self, refactored, file_content):
+        pool = self._process_pool
+        if pool is None:
+            return None
+        # 프로파일링 중인 요청이면 워커 안에서 스택을 수집해 결과와 함께 받음
+        sampler = active_sampler()
+        try:
+            if sampler is not None:
+                return pool, sampler, pool.submit(sample_call, sampler.interval,
+                                                  self._display_method(refactored), file_content)
+            return pool, None, pool.submit(self._display_method(refactored), file_content)
+        except (BrokenProcessPool, RuntimeError):
+            self._pool_broken(pool)
+            return None
+
+    def _result(self, refactored, file_content, submitted):
+        if submitted is not None:
+            pool, sampler, future = submitted
+            try:
+                result = future.result()
+                if sampler is not None:
+                    result, samples = result
+                    sampler.merge(samples, root="panel-parser-process")
+                return result
+            except BrokenProcessPool:
+                # 워커 프로세스가 죽은 경우 이번에는 직접 파싱
+                self._pool_broken(pool)
+        return self._display_method(refactored)(file_content)
+
+    def close(self):
+        with self._lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
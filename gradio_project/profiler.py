@@ -0,0 +1,154 @@
+import functools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+class _StackSampler(threading.Thread):
+    """대상 스레드의 호출 스택을 주기적으로 수집한다 (folded stack 형식)."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name="request-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # 요청을 처리하는 스레드만 수집 (다른 사용자의 요청은 섞이지 않음)
+        while not self._stop_event.wait(self.interval):
+            self._add_sample(sys._current_frames().get(self.thread_id))
+
+    def _add_sample(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            self.samples[";".join(reversed(stack))] += 1
+
+    def merge(self, samples, root):
+        # 프로세스 풀 워커에서 수집한 스택을 root 아래에 합침
+        for stack, count in samples.items():
+            self.samples[f"{root};{stack}"] += count
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+_active = threading.local()
+
+def active_sampler():
+    """현재 스레드에서 프로파일링 중인 요청의 샘플러 (없으면 None)."""
+    return getattr(_active, 'sampler', None)
+
+def sample_call(interval, func, *args):
+    """프로세스 풀 워커에서 func 를 실행하며 워커의 스택을 수집해 (결과, 샘플) 을 반환한다."""
+    sampler = _StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        result = func(*args)
+    finally:
+        sampler.stop()
+    return result, dict(sampler.samples)
+
+
+class RequestProfiler:
+    """느린 요청의 프로파일을 저장하는 훅.
+
+    enabled 일 때만 요청마다 샘플링하고, threshold_ms 를 넘긴 요청만 output_dir 에
+    flamegraph.pl / speedscope 로 열 수 있는 .folded 파일과 요청 정보(.json)를 남긴다.
+    디렉터리에는 최근 max_profiles 개만 유지한다. 프로세스 풀에서 파싱한 부분은
+    워커 안에서 수집해 panel-parser-process 아래에 합친다. 실행 중에는 toggle() 또는
+    SIGUSR1 로 켜고 끌 수 있다.
+    """
+
+    def __init__(self, output_dir='profiles', threshold_ms=1000, interval=0.005,
+                 max_profiles=50, enabled=False):
+        self.output_dir = output_dir
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.enabled = enabled
+        self._write_lock = threading.Lock()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        print(f"요청 프로파일링 {'켜짐' if self.enabled else '꺼짐'} (기준 {self.threshold_ms}ms, 저장 위치 {self.output_dir})")
+        return self.enabled
+
+    def install_signal_handler(self, signum=None):
+        # 시그널 핸들러는 메인 스레드에서만 등록할 수 있고 Windows 에는 SIGUSR1 이 없음
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, lambda *_: self.toggle())
+        return True
+
+    def run(self, name, call, context):
+        # 중첩 호출(change_session -> get_page_bundle 등)은 가장 바깥 요청만 프로파일링
+        if not self.enabled or active_sampler() is not None:
+            return call()
+
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+        # PanelParser 가 프로세스 풀 작업을 워커 안에서 프로파일링하도록 알림
+        _active.sampler = sampler
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            sampler.stop()
+            _active.sampler = None
+            if elapsed_ms >= self.threshold_ms:
+                try:
+                    self.save(name, elapsed_ms, sampler.samples, context())
+                except Exception as e:
+                    print(f"Error saving profile: {e}")
+
+    def save(self, name, elapsed_ms, samples, context):
+        with self._write_lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = time.strftime('%Y%m%d_%H%M%S')
+            base = os.path.join(
+                self.output_dir,
+                f"{stamp}_{time.time_ns() % 10**9:09d}_{name}_p{context.get('page_index')}_{int(elapsed_ms)}ms"
+            )
+            with open(base + '.folded', 'w') as f:
+                for stack, count in samples.items():
+                    f.write(f"{stack} {count}\n")
+            with open(base + '.json', 'w') as f:
+                json.dump(dict(context, handler=name, elapsed_ms=round(elapsed_ms, 1),
+                               samples=sum(samples.values()), interval_ms=self.interval * 1000),
+                          f, ensure_ascii=False, indent=2)
+            self._prune()
+
+    def _prune(self):
+        profiles = sorted(
+            (os.path.join(self.output_dir, f) for f in os.listdir(self.output_dir) if f.endswith('.folded')),
+            key=os.path.getmtime,
+        )
+        for path in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            for ext in ('.folded', '.json'):
+                try:
+                    os.remove(path[:-len('.folded')] + ext)
+                except FileNotFoundError:
+                    pass
+
+
+def profiled(method):
+    """EventHandler 진입점용 데코레이터. self.profiler 와 self.profile_context 를 사용한다."""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return self.profiler.run(
+            method.__name__,
+            lambda: method(self, *args),
+            lambda: self.profile_context(*args),
+        )
+    return wrapper
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+
+from gradio_project.agreement import AgreementAnalyzer
+
+class StatisticsPublisher:
+    """모든 사용자가 공유하는 통계 마크다운.
+
+    투표 핸들러는 mark_dirty() 로 변경만 알리고, 통계 계산은 주기적으로 호출되는
+    get_markdown() 에서 interval 초에 한 번만 수행한다. 계산된 마크다운은 한 번만
+    만들어 모든 클라이언트에 그대로 전달한다. 투표 결과 파일이 있는 세션이 둘 이상이면
+    세션(평가자) 간 일치도도 함께 표시한다.
+    """
+
+    def __init__(self, data_processor, interval=5.0, sessions=(1, 2, 3, 4),
+                 result_path='votes_result_{}.csv'):
+        self.data_processor = data_processor
+        self.interval = interval
+        self.sessions = sessions
+        self.result_path = result_path
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._last_update = float('-inf')
+        self._markdown = ""
+
+    @property
+    def markdown(self):
+        # 다시 계산하지 않고 마지막으로 계산된 통계를 반환
+        return self._markdown
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def get_markdown(self):
+        now = time.monotonic()
+        if not self._dirty or now - self._last_update < self.interval:
+            return self._markdown
+        # 이미 다른 요청이 계산 중이면 기다리지 않고 이전 값을 반환
+        if not self._lock.acquire(blocking=False):
+            return self._markdown
+        try:
+            # 계산 도중 들어온 투표는 다음 주기에 반영되도록 먼저 플래그를 내림
+            self._dirty = False
+            self._markdown = str(self.data_processor.calculate_statistics()) + self.agreement_markdown()
+            self._last_update = now
+        finally:
+            self._lock.release()
+        return self._markdown
+
+    def agreement_markdown(self):
+        # 투표 결과 파일이 있는 세션끼리만 비교 (현재 세션 파일은 투표마다 갱신됨)
+        sessions = [s for s in self.sessions if os.path.exists(self.result_path.format(s))]
+        if len(sessions) < 2:
+            return ""
+        try:
+            return AgreementAnalyzer(sessions, self.result_path).format_agreement()
+        except Exception as e:
+            print(f"Error calculating agreement: {e}")
+            return ""
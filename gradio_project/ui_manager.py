@@ -1,7 +1,7 @@
 import gradio as gr
 
 class UIManager:
-    def __init__(self, data_processor, event_handler):
+    def __init__(self, data_processor, event_handler, page_cache_size=8):
         self.data_processor = data_processor
         self.event_handler = event_handler
         self.css = """
@@ -57,15 +57,119 @@ class UIManager:
         }
         </style>
         """
+        # 페이지 로드 시 실행: 스크롤 초기화 + 클라이언트 페이지 캐시 준비
+        # 캐시에 있는 페이지는 서버 왕복 없이 바로 그리고, 서버(get_page_bundle)는
+        # 현재 페이지 상태 확인과 주변 페이지 미리 받기에만 사용한다.
         self.js = """
         function scrollToTop() {
             window.scrollTo({
                 top: 0,
                 behavior: 'smooth'
             });
+
+            const maxPages = __PAGE_CACHE_SIZE__;
+            const keep = () => ({"__type__": "update"});
+            const disabled = () => ({"__type__": "update", "interactive": false});
+            const button = (value, interactive) => (
+                interactive === undefined
+                    ? {"__type__": "update", "value": value}
+                    : {"__type__": "update", "value": value, "interactive": interactive}
+            );
+
+            window.pageCache = {
+                pages: new Map(),
+                total: null,
+                rendered: null,
+
+                clamp(page) {
+                    const last = this.total === null ? page : this.total - 1;
+                    return Math.max(0, Math.min(last, page));
+                },
+
+                store(bundle) {
+                    for (const [key, view] of Object.entries(bundle.pages)) {
+                        const page = Number(key);
+                        const entry = this.pages.get(page) || {};
+                        if (view.conversations) entry.conversations = view.conversations;
+                        entry.state = view.state;
+                        // Map 순서를 최근 사용 순으로 유지 (LRU)
+                        this.pages.delete(page);
+                        this.pages.set(page, entry);
+                    }
+                    while (this.pages.size > maxPages) {
+                        this.pages.delete(this.pages.keys().next().value);
+                    }
+                },
+
+                known() {
+                    return JSON.stringify(
+                        Array.from(this.pages.keys()).filter(page => this.pages.get(page).conversations)
+                    );
+                },
+
+                clear() {
+                    this.pages.clear();
+                    this.rendered = null;
+                },
+
+                // 출력 순서: 대화 3개, page_index, current_page, best 3, worst 3, 취소, 툴 6, slider
+                render(page) {
+                    const entry = this.pages.get(page);
+                    if (!entry || !entry.conversations || this.total === null) return null;
+                    this.pages.delete(page);
+                    this.pages.set(page, entry);
+
+                    const state = entry.state;
+                    // 같은 페이지의 상태만 바뀐 경우 대화창은 다시 그리지 않음
+                    const samePage = this.rendered !== null && this.rendered.page === page && !this.rendered.loading;
+                    this.rendered = {page: page, state: JSON.stringify(state)};
+
+                    const outputs = samePage ? [keep(), keep(), keep()] : [...entry.conversations];
+                    outputs.push(page, `현재 페이지: ${page + 1} / ${this.total}`);
+                    for (const vote of ["best", "worst"]) {
+                        for (let i = 1; i <= 3; i++) {
+                            outputs.push(button(state[vote] === i ? `모델 ${i} (선택됨)` : `모델 ${i}`, !state.neutral));
+                        }
+                    }
+                    outputs.push(button("선택 취소", true));
+                    state.tools.forEach(([up, down], n) => {
+                        outputs.push(button(up ? "👍 완료" : `모델 ${n + 1} 툴 good`, true));
+                        outputs.push(button(down ? "👎 완료" : `모델 ${n + 1} 툴 bad`, true));
+                    });
+                    outputs.push(page + 1);
+                    return outputs;
+                },
+
+                navigate(page) {
+                    const target = this.clamp(page);
+                    const outputs = this.render(target);
+                    if (outputs) return outputs;
+                    // 캐시에 없으면 페이지 번호만 바꾸고 get_page_bundle 응답을 기다림
+                    // 이전 페이지 대화를 보면서 새 페이지에 투표하지 않도록 대화창을 비우고 버튼을 잠금
+                    this.rendered = {page: target, state: null, loading: true};
+                    const total = this.total === null ? "?" : this.total;
+                    return [[], [], [], target, `현재 페이지: ${target + 1} / ${total} (불러오는 중)`,
+                            ...Array(13).fill(disabled()), target + 1];
+                },
+
+                receive(bundleText, page) {
+                    if (!bundleText) return Array(19).fill(keep());
+                    const bundle = JSON.parse(bundleText);
+                    this.total = bundle.total;
+                    this.store(bundle);
+                    // 아직 그린 페이지가 없으면(첫 로드, 세션 변경 후) 서버가 보낸 페이지를 그림
+                    const target = this.clamp(this.rendered === null ? bundle.current : page);
+                    const entry = this.pages.get(target);
+                    const unchanged = this.rendered !== null && this.rendered.page === target
+                        && entry && this.rendered.state === JSON.stringify(entry.state);
+                    return (!unchanged && this.render(target)) || Array(19).fill(keep());
+                },
+            };
             return [];
         }
-        """
+        """.replace("__PAGE_CACHE_SIZE__", str(page_cache_size))
+        # 서버에 현재 페이지와 함께 캐시에 이미 있는 페이지 목록을 보냄
+        self.known_pages_js = "(page, known) => [page, window.pageCache ? window.pageCache.known() : '[]']"
         
     def create_interface(self):
         with gr.Blocks(css=self.css, js=self.js) as iface:
@@ -131,11 +235,18 @@ class UIManager:
                             label="페이지 선택",
                             visible=True
                         )
-                        page_index = gr.State(0)
+                        # 페이지 번호는 클라이언트에 두어 캐시로 그린 페이지와 투표 대상이 항상 일치하도록 함
+                        page_index = gr.Number(value=0, precision=0, visible=False)
+                        known_pages = gr.Textbox(visible=False)
+                        page_bundle = gr.Textbox(visible=False)
 
                 # 상단: 통계
                 with gr.Column(elem_classes="statistics"):
-                    statistics = gr.Markdown("")
+                    statistics_publisher = self.event_handler.statistics_publisher
+                    statistics = gr.Markdown(
+                        statistics_publisher.get_markdown,
+                        every=statistics_publisher.interval
+                    )
 
                 # 초기 페이지 로드
                 initial_outputs1, initial_outputs2, initial_outputs3, initial_page = self.event_handler.load_initial_page()
@@ -145,166 +256,168 @@ class UIManager:
                 current_page.value = initial_page
                 
                 # 이벤트 핸들러 연결
-                slider.change(
-                    fn=self.event_handler.update_page,
+                page_outputs = [outputs1, outputs2, outputs3, page_index, current_page,
+                                best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
+                                button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
+                                slider]
+                
+                # 페이지 이동은 클라이언트 캐시로 바로 그림 (서버 호출 없음)
+                slider.release(
+                    fn=None,
+                    js="(value) => window.pageCache.navigate(value - 1)",
                     inputs=[slider],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page, 
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down]
+                    outputs=page_outputs
+                )
+                
+                # 페이지 번호가 바뀌면 서버에서 상태 확인 + 주변 페이지 미리 받기
+                page_index.change(
+                    fn=self.event_handler.get_page_bundle,
+                    api_name="page_bundle",
+                    js=self.known_pages_js,
+                    inputs=[page_index, known_pages],
+                    outputs=[page_bundle]
+                )
+                
+                # 서버 응답을 캐시에 저장하고, 아직 그리지 못했거나 상태가 바뀐 경우 다시 그림
+                page_bundle.change(
+                    fn=None,
+                    js="(bundle, page) => window.pageCache.receive(bundle, page)",
+                    inputs=[page_bundle, page_index],
+                    outputs=page_outputs
+                )
+                
+                # 첫 페이지와 주변 페이지로 캐시 채우기
+                iface.load(
+                    fn=self.event_handler.get_page_bundle,
+                    api_name=False,
+                    js=self.known_pages_js,
+                    inputs=[page_index, known_pages],
+                    outputs=[page_bundle]
                 )
                 
+                # 투표 응답은 현재 페이지의 투표 상태만 담은 page_bundle 로 받아
+                # page_bundle.change 에서 캐시에 반영하고 다시 그림 (서버 왕복 한 번)
                 best_1.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="best_1",
                     inputs=[page_index, gr.State("1"), gr.State("best")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 best_2.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="best_2",
                     inputs=[page_index, gr.State("2"), gr.State("best")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 best_3.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="best_3",
                     inputs=[page_index, gr.State("3"), gr.State("best")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 worst_1.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="worst_1",
                     inputs=[page_index, gr.State("1"), gr.State("worst")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 worst_2.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="worst_2",
                     inputs=[page_index, gr.State("2"), gr.State("worst")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 worst_3.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="worst_3",
                     inputs=[page_index, gr.State("3"), gr.State("worst")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 neutral_button.click(
                     fn=self.event_handler.update_model_vote,
+                    api_name="neutral",
                     inputs=[page_index, gr.State("N"), gr.State("neutral")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 cancel_button.click(
                     fn=self.event_handler.cancel_selection,
-                    inputs=[page_index, slider],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    api_name="cancel",
+                    inputs=[page_index],
+                    outputs=[page_bundle]
                 )
                 
                 prev_button.click(
-                    fn=self.event_handler.move_page,
-                    inputs=[page_index, gr.State(-1)],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page, 
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down, slider]
+                    fn=None,
+                    js="(page) => window.pageCache.navigate(page - 1)",
+                    inputs=[page_index],
+                    outputs=page_outputs
                 )
                 
 
                 next_button.click(
-                    fn=self.event_handler.move_page,
-                    inputs=[page_index, gr.State(1)],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page, 
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down, slider]
+                    fn=None,
+                    js="(page) => window.pageCache.navigate(page + 1)",
+                    inputs=[page_index],
+                    outputs=page_outputs
                 )
 
                 # 툴 평가 버튼 이벤트 연결
                 button_1_up.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_1_up",
                     inputs=[page_index, gr.State(1), gr.State("up")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 button_1_down.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_1_down",
                     inputs=[page_index, gr.State(1), gr.State("down")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 button_2_up.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_2_up",
                     inputs=[page_index, gr.State(2), gr.State("up")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 button_2_down.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_2_down",
                     inputs=[page_index, gr.State(2), gr.State("down")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 button_3_up.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_3_up",
                     inputs=[page_index, gr.State(3), gr.State("up")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
                 button_3_down.click(
                     fn=self.event_handler.update_tool_vote,
+                    api_name="tool_3_down",
                     inputs=[page_index, gr.State(3), gr.State("down")],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
                 
-                # 세션 변경 이벤트 핸들러 연결
+                # 세션 변경 이벤트 핸들러 연결 (투표 상태가 모두 바뀌므로 캐시를 비우고 첫 페이지부터 다시 받음)
                 session_dropdown.change(
                     fn=self.event_handler.change_session,
+                    api_name="change_session",
+                    js="(session) => { window.pageCache && window.pageCache.clear(); return session; }",
                     inputs=[session_dropdown],
-                    outputs=[outputs1, outputs2, outputs3, page_index, current_page,
-                            best_1, best_2, best_3, worst_1, worst_2, worst_3, cancel_button,
-                            button_1_up, button_1_down, button_2_up, button_2_down, button_3_up, button_3_down,
-                            slider, statistics]
+                    outputs=[page_bundle]
                 )
 
         return iface
\ No newline at end of file
@@ -0,0 +1,448 @@
+"""여러 평가자가 동시에 접속하는 상황을 흉내내는 부하 테스트 스크립트.
+
+`main.create_interface`로 로컬 서버를 띄운 뒤, 평가자마다 별도의
+`gradio_client.Client` 세션을 만들어 페이지 이동 / best·worst·중립 투표 /
+툴 평가 / 선택 취소 / 세션 변경을 섞어서 호출한다. 실행이 끝나면 엔드포인트별
+처리량과 p50/p95/p99 지연을 출력하고, 저장된 votes_result_{n}.csv 가
+보낸 투표와 일치하는지 검증한다.
+
+    python load_test.py --users 20 --actions 50 --pages 200
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from gradio_client import Client
+
+# 평가자 행동 비율 (가중치)
+DEFAULT_MIX = {
+    'move': 40,
+    'best': 15,
+    'worst': 15,
+    'neutral': 5,
+    'tool': 15,
+    'cancel': 5,
+    'session': 1,
+}
+
+SESSIONS = ["세션 1", "세션 2", "세션 3", "세션 4"]
+
+
+def make_synthetic_csv(path, pages, turns):
+    # data1 은 model A 형식(memory.messages), data2/3 은 refactored 형식(messages)
+    rows = []
+    for page in range(pages):
+        legacy = []
+        refactored = []
+        for turn in range(turns):
+            question = f"페이지 {page} 질문 {turn}"
+            legacy.append({"type": "human", "data": {"content": question}})
+            legacy.append({"type": "ai", "data": {"content": f"search('{question}')",
+                                                 "additional_kwargs": {"tool_name": "search"}}})
+            legacy.append({"type": "AIMessageChunk", "data": {"content": f"답변 {turn}\\n" * 5}})
+            refactored.append({"type": "human", "data": {"content": question}})
+            refactored.append({"type": "ai", "data": {"content": "",
+                                                     "tool_calls": [{"name": "search", "args": {"q": question}}]}})
+            refactored.append({"type": "tool", "data": {"name": "search",
+                                                       "content": f"```\n결과 {turn}\n```"}})
+            refactored.append({"type": "ai", "data": {"content": f"답변 {turn}"}})
+        rows.append({
+            'data1': str({"memory": {"messages": legacy}}),
+            'data2': str({"messages": refactored}),
+            'data3': str({"messages": refactored}),
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def write_mapping(path, pages, seed):
+    # DataProcessor 가 읽어갈 세션 1 매핑을 미리 만들어 둔다 (투표 un-blind 용)
+    rng = random.Random(seed)
+    mappings = {}
+    for page in range(pages):
+        models = ['A', 'B', 'C']
+        rng.shuffle(models)
+        mappings[str(page)] = {str(i + 1): model for i, model in enumerate(models)}
+    with open(path, 'w') as f:
+        json.dump(mappings, f)
+    return mappings
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class PageModel:
+    """한 세션에서 한 페이지의 예상 투표 상태. EventHandler 의 갱신 규칙을 그대로 따른다."""
+
+    def __init__(self):
+        self.best = ''
+        self.worst = ''
+        self.tools = {f'model{m}_{v}': 0 for m in ['A', 'B', 'C'] for v in ['up', 'down']}
+
+    def apply(self, op):
+        kind = op['kind']
+        if kind == 'neutral':
+            self.best = 'N'
+            self.worst = 'N'
+        elif kind == 'best':
+            self.best = op['model']
+            if self.worst == op['model']:
+                self.worst = ''
+        elif kind == 'worst':
+            self.worst = op['model']
+            if self.best == op['model']:
+                self.best = ''
+        elif kind == 'tool':
+            opposite = 'down' if op['vote'] == 'up' else 'up'
+            self.tools[f"model{op['model']}_{opposite}"] = 0
+            column = f"model{op['model']}_{op['vote']}"
+            self.tools[column] = 0 if self.tools[column] == 1 else 1
+        elif kind == 'cancel':
+            self.best = ''
+            self.worst = ''
+            for column in self.tools:
+                self.tools[column] = 0
+
+    def is_empty(self):
+        return self.best == '' and self.worst == '' and not any(self.tools.values())
+
+
+class Annotator:
+    def __init__(self, user_id, url, owned_pages, mappings, mix, actions, seed, recorder):
+        self.user_id = user_id
+        self.url = url
+        self.owned_pages = owned_pages
+        self.mappings = mappings
+        self.mix = mix
+        self.actions = actions
+        self.rng = random.Random(seed + user_id)
+        self.recorder = recorder
+        self.page = 0
+        # 클라이언트 페이지 캐시 (UIManager 기본 크기와 동일)
+        self.known_pages = OrderedDict()
+        self.cache_size = 8
+
+    def call(self, api_name, *args):
+        start = time.perf_counter()
+        try:
+            result = self.client.predict(*args, api_name=f"/{api_name}")
+            ok = True
+        except Exception as e:
+            print(f"[user {self.user_id}] {api_name} 실패: {e}")
+            result = None
+            ok = False
+        end = time.perf_counter()
+        self.recorder.record(api_name, end - start, ok)
+        return start, end, ok, result
+
+    def fetch_bundle(self, page):
+        # 브라우저 페이지 캐시처럼 대화가 있는 페이지 목록을 보내고 응답을 캐시에 넣는다
+        known = json.dumps(list(self.known_pages))
+        _, _, ok, result = self.call('page_bundle', page, known)
+        if ok:
+            self.store_bundle(result)
+        return ok
+
+    def store_bundle(self, result):
+        for key, view in json.loads(result)['pages'].items():
+            if 'conversations' in view:
+                self.known_pages[int(key)] = True
+            if int(key) in self.known_pages:
+                self.known_pages.move_to_end(int(key))
+        while len(self.known_pages) > self.cache_size:
+            self.known_pages.popitem(last=False)
+
+    def navigate(self, target):
+        # 페이지 이동은 클라이언트에서 처리되고 서버에는 page_bundle 요청만 간다
+        target = max(0, min(self.recorder.pages - 1, target))
+        if target == self.page:
+            return
+        self.page = target
+        self.fetch_bundle(target)
+
+    def goto_owned_page(self):
+        self.navigate(self.rng.choice(self.owned_pages))
+
+    def move(self):
+        choice = self.rng.random()
+        if choice < 0.4:
+            self.navigate(self.page + 1)
+        elif choice < 0.8:
+            self.navigate(self.page - 1)
+        else:
+            self.goto_owned_page()
+
+    def vote(self, kind):
+        if self.page not in self.owned_pages:
+            self.goto_owned_page()
+        page = self.page
+        mapping = self.mappings[str(page)]
+        display_num = self.rng.randint(1, 3)
+        op = {'kind': kind, 'page': page, 'user': self.user_id}
+        if kind in ('best', 'worst'):
+            api_name = f'{kind}_{display_num}'
+            op['model'] = mapping[str(display_num)]
+            args = (page,)
+        elif kind == 'tool':
+            vote = self.rng.choice(['up', 'down'])
+            api_name = f'tool_{display_num}_{vote}'
+            op['model'] = mapping[str(display_num)]
+            op['vote'] = vote
+            args = (page,)
+        elif kind == 'neutral':
+            api_name = 'neutral'
+            args = (page,)
+        else:
+            api_name = 'cancel'
+            args = (page,)
+        op['start'], op['end'], ok, result = self.call(api_name, *args)
+        if ok:
+            self.recorder.add_op(op)
+            # 투표 응답(현재 페이지 상태)으로 바로 캐시를 갱신함
+            self.store_bundle(result)
+
+    def change_session(self):
+        session = self.rng.choice(SESSIONS)
+        op = {'kind': 'session', 'session': session, 'user': self.user_id}
+        op['start'], op['end'], ok, result = self.call('change_session', session)
+        if ok:
+            self.page = 0
+            self.recorder.add_op(op)
+            # 세션 변경 응답에 첫 페이지와 주변 페이지가 함께 옴
+            self.known_pages.clear()
+            self.store_bundle(result)
+
+    def run(self):
+        self.client = Client(self.url, verbose=False)
+        # 페이지 로드 시 첫 페이지 캐시 채우기
+        self.fetch_bundle(0)
+        kinds = list(self.mix)
+        weights = [self.mix[k] for k in kinds]
+        for _ in range(self.actions):
+            kind = self.rng.choices(kinds, weights)[0]
+            if kind == 'move':
+                self.move()
+            elif kind == 'session':
+                self.change_session()
+            else:
+                self.vote(kind)
+
+
+class Recorder:
+    def __init__(self, pages):
+        self.pages = pages
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.ops = []
+
+    def record(self, api_name, elapsed, ok):
+        with self.lock:
+            self.latencies[api_name].append(elapsed)
+            if not ok:
+                self.errors[api_name] += 1
+
+    def add_op(self, op):
+        with self.lock:
+            self.ops.append(op)
+
+    def report(self, wall_time):
+        total = sum(len(v) for v in self.latencies.values())
+        lines = [
+            f"총 요청: {total}건, 소요 시간: {wall_time:.1f}s, 처리량: {total / wall_time:.1f} req/s",
+            f"{'endpoint':<16}{'count':>7}{'errors':>8}{'req/s':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}",
+        ]
+        for api_name in sorted(self.latencies):
+            values = sorted(self.latencies[api_name])
+            lines.append(
+                f"{api_name:<16}{len(values):>7}{self.errors[api_name]:>8}{len(values) / wall_time:>8.1f}"
+                f"{percentile(values, 50) * 1000:>10.1f}"
+                f"{percentile(values, 95) * 1000:>10.1f}"
+                f"{percentile(values, 99) * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def session_timeline(switches):
+    """세션 변경을 시간이 겹치는 것끼리 묶어 [(시작, 끝, 이후 세션)] 을 만든다.
+
+    서버에는 세션이 하나뿐이므로 투표는 그 시점의 세션 파일에 기록된다. 서로 겹친
+    변경이 다른 세션을 고르면 서버 적용 순서를 알 수 없으므로 이후 세션은 None.
+    """
+    timeline = []
+    for switch in sorted(switches, key=lambda op: op['start']):
+        session = int(switch['session'].split()[-1])
+        if timeline and switch['start'] < timeline[-1][1]:
+            start, end, current = timeline[-1]
+            timeline[-1] = (start, max(end, switch['end']), current if current == session else None)
+        else:
+            timeline.append((switch['start'], switch['end'], session))
+    return timeline
+
+
+def verify_votes(recorder, workdir):
+    """저장된 세션별 투표 결과를 평가자가 보낸 투표로 재구성한 상태와 비교한다.
+
+    각 페이지는 한 평가자만 투표하므로 페이지 안의 순서는 확정된다. 투표는 보낸
+    시점의 서버 세션에 적용되고, 세션을 바꿔도 다른 세션의 파일은 바뀌지 않아야
+    한다. 모든 votes_result_{n}.csv 를 확인한다. 세션 변경과 시간이 겹치거나 세션을
+    알 수 없는 구간에 투표한 페이지는 검증에서 제외한다.
+    """
+    results = {}
+    for path in glob.glob(os.path.join(workdir, 'votes_result_*.csv')):
+        session = os.path.basename(path)[len('votes_result_'):-len('.csv')]
+        if session.isdigit():
+            results[int(session)] = pd.read_csv(path, keep_default_na=False)
+    if not results:
+        return 0, 0, 0, ["투표 결과 파일이 없습니다."]
+
+    timeline = session_timeline([op for op in recorder.ops if op['kind'] == 'session'])
+    by_page = defaultdict(list)
+    for op in recorder.ops:
+        if op['kind'] != 'session':
+            by_page[op['page']].append(op)
+
+    def session_at(op):
+        # 서버는 세션 1 로 시작
+        session = 1
+        for start, end, current in timeline:
+            if op['start'] < end and start < op['end']:
+                return None
+            if end <= op['start']:
+                session = current
+        return session
+
+    sessions = sorted(set(results) | {int(name.split()[-1]) for name in SESSIONS})
+    checked = skipped = 0
+    mismatches = []
+    for page, ops in by_page.items():
+        ops = sorted(ops, key=lambda op: op['start'])
+        op_sessions = [session_at(op) for op in ops]
+        if None in op_sessions:
+            skipped += 1
+            continue
+        expected = defaultdict(PageModel)
+        for op, session in zip(ops, op_sessions):
+            expected[session].apply(op)
+
+        for session in sessions:
+            model = expected[session]
+            votes_df = results.get(session)
+            if votes_df is None:
+                if not model.is_empty():
+                    mismatches.append(f"세션 {session} 페이지 {page}: 투표했지만 결과 파일이 없음")
+                continue
+            row = votes_df.iloc[page]
+            actual_best = str(row['best_model'])
+            actual_worst = str(row['worst_model'])
+            if actual_best != model.best or actual_worst != model.worst:
+                mismatches.append(
+                    f"세션 {session} 페이지 {page}: best/worst 예상 {model.best!r}/{model.worst!r}, "
+                    f"저장 {actual_best!r}/{actual_worst!r}"
+                )
+            for column, value in model.tools.items():
+                if int(row[column]) != value:
+                    mismatches.append(f"세션 {session} 페이지 {page}: {column} 예상 {value}, 저장 {row[column]}")
+        checked += 1
+    return checked, skipped, len(mismatches), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="다중 평가자 부하 테스트")
+    parser.add_argument('--users', type=int, default=10, help="동시 평가자 수")
+    parser.add_argument('--actions', type=int, default=30, help="평가자당 행동 수")
+    parser.add_argument('--csv', default=None, help="사용할 데이터 csv (없으면 합성 데이터 생성)")
+    parser.add_argument('--pages', type=int, default=100, help="합성 데이터 페이지 수")
+    parser.add_argument('--turns', type=int, default=3, help="합성 대화의 질문 수")
+    parser.add_argument('--port', type=int, default=7870)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--session-weight', type=int, default=DEFAULT_MIX['session'],
+                        help="세션 변경 비율 (0 이면 세션 변경 없음)")
+    parser.add_argument('--keep', action='store_true', help="작업 디렉터리를 지우지 않음")
+    args = parser.parse_args()
+
+    # DataProcessor 는 현재 디렉터리에 매핑/투표 파일을 쓰므로 임시 디렉터리에서 실행
+    workdir = tempfile.mkdtemp(prefix='gradio_load_test_')
+    csv_path = os.path.join(workdir, 'output.csv')
+    if args.csv:
+        shutil.copy(args.csv, csv_path)
+    else:
+        make_synthetic_csv(csv_path, args.pages, args.turns)
+    pages = len(pd.read_csv(csv_path))
+    if pages < args.users:
+        parser.error(f"페이지 수({pages})가 평가자 수보다 적습니다.")
+
+    mappings = write_mapping(os.path.join(workdir, 'session_1_mapping.json'), pages, args.seed)
+
+    from main import create_interface
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    interface = None
+    try:
+        interface = create_interface(csv_path, server_name="127.0.0.1", server_port=args.port, share=False)
+        url = interface.local_url
+
+        mix = dict(DEFAULT_MIX, session=args.session_weight)
+        recorder = Recorder(pages)
+        annotators = [
+            Annotator(
+                user_id, url,
+                # 평가자마다 서로 겹치지 않는 페이지만 투표
+                [p for p in range(pages) if p % args.users == user_id],
+                mappings, mix, args.actions, args.seed, recorder,
+            )
+            for user_id in range(args.users)
+        ]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as executor:
+            for future in [executor.submit(a.run) for a in annotators]:
+                future.result()
+        wall_time = time.perf_counter() - start
+
+        print(recorder.report(wall_time))
+
+        checked, skipped, failed, mismatches = verify_votes(recorder, workdir)
+        print(f"\n투표 검증: {checked}페이지 확인, {skipped}페이지 제외(세션 변경과 겹침), 불일치 {failed}건")
+        for line in mismatches[:20]:
+            print(f"  {line}")
+    finally:
+        if interface is not None:
+            interface.close()
+        os.chdir(cwd)
+        if args.keep:
+            print(f"작업 디렉터리: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # 서버가 요청을 거부해도 불일치 0건으로 보이지 않도록 오류와 검증 대상 없음도 실패로 처리
+    errors = sum(recorder.errors.values())
+    problems = []
+    if errors:
+        problems.append(f"요청 오류 {errors}건")
+    if checked == 0:
+        problems.append("검증한 페이지가 없음")
+    if failed:
+        problems.append(f"투표 불일치 {failed}건")
+    if problems:
+        print(f"\n부하 테스트 실패: {', '.join(problems)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,41 @@ from gradio_project.event_handler import EventHandler
 from gradio_project.ui_manager import UIManager
 import gradio as gr
 
-def create_interface():
+def create_interface(csv_path='output.csv', server_name="0.0.0.0", server_port=7869, share=True,
+                     parse_workers=None, stats_interval=5.0, parse_cache_mb=64):
     # 기본 세션으로 1번 세션 사용
-    data_processor = DataProcessor('output.csv', session=1)
-    event_handler = EventHandler(data_processor)
+    data_processor = DataProcessor(csv_path, session=1)
+    event_handler = EventHandler(data_processor, parse_workers=parse_workers,
+                                 stats_interval=stats_interval,
+                                 parse_cache_bytes=parse_cache_mb * 1024 * 1024)
+    # kill -USR1 <pid> 로 느린 요청 프로파일링을 켜고 끔
+    event_handler.profiler.install_signal_handler()
     ui_manager = UIManager(data_processor, event_handler)
     
     interface = ui_manager.create_interface()
+    # 서버를 닫을 때 파싱용 워커 프로세스도 함께 종료
+    close_interface = interface.close
+    def close(*args, **kwargs):
+        try:
+            return close_interface(*args, **kwargs)
+        finally:
+            event_handler.close()
+    interface.close = close
     interface.queue()
     interface.launch(
-        server_name="0.0.0.0",
-        server_port=7869,
-        share=True,
+        server_name=server_name,
+        server_port=server_port,
+        share=share,
         prevent_thread_lock=True,
     )
     return interface
 
 def main():
-    create_interface()
+    interface = create_interface()
     
     # 프로그램이 종료되지 않도록 대기  
     input("Press Enter to exit...")
+    interface.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from gradio_project.agreement import AgreementAnalyzer
+
+# https://en.wikipedia.org/wiki/Fleiss%27_kappa 의 예시 (14명, 10개 대상, 5개 범주)
+WIKIPEDIA_FLEISS = np.array([
+    [0, 0, 0, 0, 14],
+    [0, 2, 6, 4, 2],
+    [0, 0, 3, 5, 6],
+    [0, 3, 9, 2, 0],
+    [2, 2, 8, 1, 1],
+    [7, 7, 0, 0, 0],
+    [3, 2, 6, 3, 0],
+    [2, 5, 3, 2, 2],
+    [6, 5, 2, 1, 0],
+    [0, 2, 2, 3, 7],
+])
+
+# Krippendorff (2011) "Computing Krippendorff's Alpha-Reliability" 의 결측 포함 예시
+# (평가자 4명, 대상 12개, 범주 1~5, 명목 척도 alpha = 0.743)
+KRIPPENDORFF_RATINGS = [
+    [1, 2, 3, 3, 2, 1, 4, 1, 2, None, None, None],
+    [1, 2, 3, 3, 2, 2, 4, 1, 2, 5, None, 3],
+    [None, 3, 3, 3, 2, 3, 4, 2, 2, 5, 1, None],
+    [1, 2, 3, 3, 2, 4, 4, 1, 2, 5, 1, None],
+]
+
+
+def test_fleiss_kappa_wikipedia_example():
+    assert math.isclose(AgreementAnalyzer.fleiss_kappa(WIKIPEDIA_FLEISS), 0.20993, abs_tol=1e-5)
+
+
+def test_krippendorff_alpha_nominal_example():
+    counts = np.zeros((12, 5), dtype=int)
+    for ratings in KRIPPENDORFF_RATINGS:
+        for unit, value in enumerate(ratings):
+            if value is not None:
+                counts[unit, value - 1] += 1
+    assert math.isclose(AgreementAnalyzer.krippendorff_alpha(counts), 0.743, abs_tol=5e-4)
+
+
+def test_perfect_agreement_across_session_files(tmp_path):
+    votes = pd.DataFrame({
+        'best_model': ['A', 'B', 'N'],
+        'worst_model': ['C', 'A', 'N'],
+        'modelA_up': [1, 0, 0], 'modelA_down': [0, 1, 0],
+        'modelB_up': [0, 0, 1], 'modelB_down': [0, 0, 0],
+        'modelC_up': [0, 0, 0], 'modelC_down': [1, 0, 0],
+    })
+    result_path = str(tmp_path / 'votes_result_{}.csv')
+    for session in (1, 2):
+        votes.to_csv(result_path.format(session), index=False)
+
+    results = AgreementAnalyzer([1, 2], result_path).calculate_agreement()
+    assert results['best'] == {'items': 3, 'fleiss_kappa': 1.0, 'krippendorff_alpha': 1.0, 'disagreements': 0}
+    assert results['tool']['items'] == 4
+
+
+def test_no_sessions():
+    analyzer = AgreementAnalyzer([])
+    assert analyzer.best_codes.shape == (0, 0)
+    assert analyzer.tool_codes.shape == (0, 0)
+    assert len(analyzer.page_disagreements()) == 0
+    assert math.isnan(analyzer.calculate_agreement()['best']['fleiss_kappa'])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gradio_project.data_processor import DataProcessor
+
+FIRST = str({'messages': [{'role': 'user', 'content': '첫 번째 대화'}]})
+SECOND = str({'messages': [{'role': 'user', 'content': '두 번째 대화'}]})
+
+
+@pytest.fixture
+def data_processor(tmp_path, monkeypatch):
+    # DataProcessor 는 현재 디렉터리에 매핑/투표 파일을 씀
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({
+        'data1': [FIRST, SECOND, FIRST],
+        'data2': [FIRST, SECOND, np.nan],
+        'data3': [SECOND, SECOND, SECOND],
+    }).to_csv('output.csv', index=False)
+    return DataProcessor('output.csv')
+
+
+def test_identical_transcripts_share_one_object(data_processor):
+    df = data_processor.df
+    assert df.at[0, 'data1'] is df.at[2, 'data1'] is df.at[0, 'data2']
+    assert df.at[1, 'data1'] is df.at[0, 'data3'] is df.at[2, 'data3']
+    assert len(data_processor.transcripts) == 2
+
+
+def test_dedupe_stats(data_processor):
+    stats = data_processor.dedupe_stats
+    assert stats['total'] == 8
+    assert stats['unique'] == 2
+    assert stats['ratio'] == pytest.approx(4.0)
+    assert stats['bytes_saved'] > 0
+
+
+def test_get_transcript_returns_content_and_key(data_processor):
+    content, key = data_processor.get_transcript(0, 'A')
+    assert content == FIRST
+    assert data_processor.get_transcript(0, 'B')[1] == key
+    assert data_processor.get_transcript(1, 'A')[1] != key
+
+    # 비어 있는 칸은 해시 없이 원래 값 그대로
+    content, key = data_processor.get_transcript(2, 'B')
+    assert key is None
+    assert pd.isna(content)
@@ -0,0 +1,46 @@
+import json
+
+import pandas as pd
+import pytest
+
+from gradio_project.agreement import AgreementAnalyzer
+from gradio_project.data_processor import DataProcessor
+from gradio_project.event_handler import EventHandler
+
+CONVERSATION = str({'messages': [{'role': 'user', 'content': '안녕하세요'}]})
+
+
+@pytest.fixture
+def event_handler(tmp_path, monkeypatch):
+    # DataProcessor 는 현재 디렉터리에 매핑/투표 파일을 씀
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({f'data{k}': [CONVERSATION] * 3 for k in range(1, 4)}).to_csv('output.csv', index=False)
+    with open('session_1_mapping.json', 'w') as f:
+        json.dump({str(page): {'1': 'C', '2': 'A', '3': 'B'} for page in range(3)}, f)
+    handler = EventHandler(DataProcessor('output.csv'), parse_workers=0)
+    yield handler
+    handler.close()
+
+
+def display_num(handler, page, model):
+    mapping = handler.data_processor.get_mapping_for_page(page)
+    return next(int(i) for i, m in mapping.items() if m == model)
+
+
+def test_change_session_keeps_each_sessions_votes(event_handler):
+    event_handler.update_tool_vote(0, display_num(event_handler, 0, 'A'), 'up')
+    event_handler.update_model_vote(1, str(display_num(event_handler, 1, 'B')), 'best')
+
+    # 새 세션은 투표 없이 시작하고 이전 세션의 투표가 복사되지 않음
+    event_handler.change_session('세션 2')
+    session_2 = pd.read_csv('votes_result_2.csv', keep_default_na=False)
+    assert (session_2['best_model'] == '').all()
+    assert session_2[[f'model{m}_{v}' for m in 'ABC' for v in ('up', 'down')]].to_numpy().sum() == 0
+    assert AgreementAnalyzer([1, 2]).calculate_agreement()['tool']['items'] == 0
+
+    # 돌아오면 세션 1 의 투표를 그대로 불러옴
+    event_handler.change_session('세션 1')
+    df = event_handler.data_processor.df
+    assert df.at[1, 'best_model'] == 'B'
+    assert df.at[0, 'modelA_up'] == 1
+    assert pd.read_csv('votes_result_1.csv', keep_default_na=False).at[1, 'best_model'] == 'B'
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+from gradio_project.data_processor import DataProcessor
+from gradio_project.panel_parser import PanelParser
+
+CONVERSATION = str({'messages': [{'role': 'user', 'content': '안녕하세요'}]})
+
+
+class BlockingParse:
+    """첫 호출이 release 될 때까지 멈춰 있는 파싱 함수 (호출 횟수 기록)."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, file_content):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [[file_content, None]]
+
+
+def run_in_thread(parser, panels):
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = parser.display_panels(panels)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def track_waiters(parser, monkeypatch):
+    # 다른 요청이 파싱 중인 대화를 기다리게 되면 set 되는 Event
+    waiting = threading.Event()
+    claim = parser._claim
+
+    def tracking_claim(cache_key):
+        cached, pending = claim(cache_key)
+        if pending is not None:
+            waiting.set()
+        return cached, pending
+
+    monkeypatch.setattr(parser, '_claim', tracking_claim)
+    return waiting
+
+
+def test_concurrent_requests_share_one_parse(monkeypatch):
+    parse = BlockingParse()
+    monkeypatch.setattr(DataProcessor, 'display_conversations_refactored', staticmethod(parse))
+    parser = PanelParser(max_workers=0)
+    waiting = track_waiters(parser, monkeypatch)
+    panels = [(True, CONVERSATION, 'k'), (True, CONVERSATION, 'k')]
+
+    first, first_outcome = run_in_thread(parser, panels)
+    assert parse.started.wait(5)
+    second, second_outcome = run_in_thread(parser, panels)
+    assert waiting.wait(5)
+    parse.release.set()
+    first.join(5)
+    second.join(5)
+
+    assert parse.calls == 1
+    assert first_outcome['result'][0] is second_outcome['result'][0] is second_outcome['result'][1]
+    assert parser._inflight == {}
+
+
+def test_failed_parse_releases_waiters(monkeypatch):
+    parse = BlockingParse(error=RuntimeError("parse failed"))
+    monkeypatch.setattr(DataProcessor, 'display_conversations_refactored', staticmethod(parse))
+    parser = PanelParser(max_workers=0)
+    waiting = track_waiters(parser, monkeypatch)
+    panels = [(True, CONVERSATION, 'k')]
+
+    first, first_outcome = run_in_thread(parser, panels)
+    assert parse.started.wait(5)
+    second, second_outcome = run_in_thread(parser, panels)
+    assert waiting.wait(5)
+    parse.release.set()
+    first.join(5)
+    second.join(5)
+
+    assert isinstance(first_outcome['error'], RuntimeError)
+    assert second_outcome['error'] is first_outcome['error']
+    assert parser._inflight == {}
+
+    # 실패 후 같은 대화를 다시 요청하면 새로 파싱
+    parse.error = None
+    assert parser.display_panels(panels) == [[[CONVERSATION, None]]]
+
+
+def test_failed_submit_releases_claims(monkeypatch):
+    parser = PanelParser(max_workers=0, process_threshold=0)
+
+    def broken_submit(refactored, file_content):
+        raise OSError("cannot spawn worker")
+
+    # 프로세스 풀에 넘기는 단계에서 실패해도 맡았던 대화가 계속 잠겨 있지 않아야 함
+    monkeypatch.setattr(parser, '_process_pool', object())
+    monkeypatch.setattr(parser, '_submit', broken_submit)
+    with pytest.raises(OSError):
+        parser.display_panels([(True, CONVERSATION, 'k')])
+    assert parser._inflight == {}
+
+    monkeypatch.undo()
+    thread, outcome = run_in_thread(parser, [(True, CONVERSATION, 'k')])
+    thread.join(5)
+    assert not thread.is_alive()
+    assert 'result' in outcome
+
+
+def test_cache_is_limited_by_size(monkeypatch):
+    monkeypatch.setattr(DataProcessor, 'display_conversations_refactored',
+                        staticmethod(lambda file_content: [[file_content, None]]))
+    parser = PanelParser(max_workers=0)
+    small, large = 'a' * 100, 'b' * 10_000
+    parser.cache_bytes = PanelParser._result_size([[small, None]]) * 2
+
+    parser.display_panels([(True, small, 'small-1'), (True, small, 'small-2')])
+    assert list(parser._cache) == [(True, 'small-1'), (True, 'small-2')]
+
+    # 한도보다 큰 결과는 보관하지 않고, 새 결과가 들어오면 오래된 것부터 비움
+    assert parser.display_panels([(True, large, 'large')]) == [[[large, None]]]
+    assert (True, 'large') not in parser._cache
+    parser.display_panels([(True, small, 'small-3')])
+    assert list(parser._cache) == [(True, 'small-2'), (True, 'small-3')]
+    assert parser._cached_bytes <= parser.cache_bytes